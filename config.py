@@ -0,0 +1,60 @@
+"""
+ @copyright Copyright (C) 2024 Dennis Greguhn <dev@greguhn.de>
+ 
+ @author Dennis Greguhn <dev@greguhn.de>
+ 
+ @license AGPL-3.0-or-later
+ 
+ This program is free software: you can redistribute it and/or modify
+ it under the terms of the GNU Affero General Public License as
+ published by the Free Software Foundation, either version 3 of the
+ License, or (at your option) any later version.
+ 
+ This program is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU Affero General Public License for more details.
+ 
+ You should have received a copy of the GNU Affero General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+from dataclasses import dataclass
+
+@dataclass(frozen=True, slots=True)
+class Config:
+	"""Immutable updater configuration, read once from the environment (.env)
+	"""
+	data_folder:str
+	token_path:str
+	graphql_host:str
+	eod_api_key:str=None
+	updater_log_level:str='INFO'
+
+	REQUIRED = ('data_folder', 'token_path', 'graphql_host')
+
+	@classmethod
+	def from_env(cls) -> 'Config':
+		"""Read all configuration values from the environment variables
+
+		Raises:
+			Exception: If a required environment variable is missing
+
+		Returns:
+			Config: The configuration object
+		"""
+		for key in cls.REQUIRED:
+			if not os.environ.get(key):
+				raise Exception(f'Missing environment variable {key}')
+
+		return cls(
+			data_folder=os.environ.get('data_folder'),
+			token_path=os.environ.get('token_path'),
+			graphql_host=os.environ.get('graphql_host'),
+			eod_api_key=os.environ.get('eod_api_key') or None,
+			updater_log_level=os.environ.get('updater_log_level', 'INFO').upper()
+		)
+
+
+CONFIG = Config.from_env()
@@ -19,8 +19,18 @@
  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import os
+import io
+import sys
+import time
+import queue
+import atexit
 import logging
+from logging.handlers import QueueHandler, QueueListener
+
+from config import CONFIG
+
+# Resolve the log level once, all loggers share the same level
+LOG_LEVEL = logging._nameToLevel[CONFIG.updater_log_level]
 
 # Static log config for uvicorn matches the internal app format
 UVICON_CONFIG = {
@@ -57,9 +67,34 @@ UVICON_CONFIG = {
 }
 
 
+# https://docs.python.org/3/library/logging.html#logrecord-attributes
+LOG_FORMAT = '%(asctime)s | ^COL_START^%(levelname)s^COL_END^	| %(name)s:	%(message)s'
+
+
+class CachedTimeFormatter(logging.Formatter):
+	"""Formatter which reuses the formatted asctime for all records within the same second"""
+
+	def __init__(self, fmt):
+		super().__init__(fmt)
+		self._lastSecond = None
+		self._lastTime = None
+
+	def formatTime(self, record, datefmt=None):
+		if datefmt != None:
+			return super().formatTime(record, datefmt)
+
+		second = int(record.created)
+		if second != self._lastSecond:
+			self._lastTime = time.strftime(self.default_time_format, self.converter(record.created))
+			self._lastSecond = second
+		return self.default_msec_format % (self._lastTime, record.msecs)
+
+
 class CustomLogFormat(logging.Formatter):
 	"""Logging colored formatter, adapted from https://stackoverflow.com/a/56944256/3638629"""
 
+	__slots__ = ('FORMATS', '_FORMATTERS', '_DEFAULT_FORMATTER')
+
 	grey = '\x1b[38;21m'
 	blue = '\x1b[38;5;39m'
 	green = '\x1b[32m'
@@ -68,22 +103,62 @@ class CustomLogFormat(logging.Formatter):
 	bold_red = '\x1b[31;1m'
 	reset = '\x1b[0m'
 
-	def __init__(self, fmt):
+	def __init__(self, fmt:str=LOG_FORMAT):
 		super().__init__()
-		self.fmt = fmt
-
-		self.FORMATS = {
-			logging.DEBUG: self.fmt.replace('^COL_START^', self.grey).replace('^COL_END^', self.reset),
-			logging.INFO: self.fmt.replace('^COL_START^', self.green).replace('^COL_END^', self.reset),
-			logging.WARNING: self.fmt.replace('^COL_START^', self.yellow).replace('^COL_END^', self.reset),
-			logging.ERROR: self.fmt.replace('^COL_START^', self.red).replace('^COL_END^', self.reset),
-			logging.CRITICAL: self.fmt.replace('^COL_START^', self.bold_red).replace('^COL_END^', self.reset),
+
+		# The formats of the default template are built once at import
+		self.FORMATS = LEVEL_FORMATS if fmt == LOG_FORMAT else self.levelFormats(fmt)
+		# Build the formatters only once instead of on every record
+		self._FORMATTERS = {level: CachedTimeFormatter(f) for level, f in self.FORMATS.items()}
+		self._DEFAULT_FORMATTER = CachedTimeFormatter(fmt.replace('^COL_START^', '').replace('^COL_END^', ''))
+
+	@classmethod
+	def levelFormats(cls, fmt:str) -> dict:
+		"""Replace the color placeholders of a format string for all log levels
+
+		Args:
+			fmt (str): Format string with ^COL_START^ and ^COL_END^ placeholders
+
+		Returns:
+			dict: Format string for each log level
+		"""
+		return {
+			logging.DEBUG: fmt.replace('^COL_START^', cls.grey).replace('^COL_END^', cls.reset),
+			logging.INFO: fmt.replace('^COL_START^', cls.green).replace('^COL_END^', cls.reset),
+			logging.WARNING: fmt.replace('^COL_START^', cls.yellow).replace('^COL_END^', cls.reset),
+			logging.ERROR: fmt.replace('^COL_START^', cls.red).replace('^COL_END^', cls.reset),
+			logging.CRITICAL: fmt.replace('^COL_START^', cls.bold_red).replace('^COL_END^', cls.reset),
 		}
 
 	def format(self, record):
-		log_fmt = self.FORMATS.get(record.levelno)
-		formatter = logging.Formatter(log_fmt)
-		return formatter.format(record)
+		return self._FORMATTERS.get(record.levelno, self._DEFAULT_FORMATTER).format(record)
+
+
+LEVEL_FORMATS = CustomLogFormat.levelFormats(LOG_FORMAT)
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+	"""StreamHandler without a flush after every record, the stream is flushed by the **BufferedQueueListener**"""
+
+	def flush(self):
+		pass
+
+
+class BufferedQueueListener(QueueListener):
+	"""QueueListener which flushes the log stream once all queued records are written"""
+
+	def __init__(self, queue, stream, *handlers):
+		super().__init__(queue, *handlers)
+		self.stream = stream
+
+	def dequeue(self, block):
+		if self.queue.empty():
+			self.stream.flush()
+		return super().dequeue(block)
+
+	def stop(self):
+		super().stop()
+		self.stream.flush()
 
 
 def getNewLogger(name:str) -> logging.Logger:
@@ -96,10 +171,30 @@ def getNewLogger(name:str) -> logging.Logger:
 		logging.Logger: The new logger instance
 	"""
 	log = logging.getLogger(name)
-	log.setLevel(logging._nameToLevel[os.environ.get('updater_log_level').upper()])
-	stdout_handler = logging.StreamHandler()
-	stdout_handler.setLevel(logging._nameToLevel[os.environ.get('updater_log_level').upper()])
-	# https://docs.python.org/3/library/logging.html#logrecord-attributes
-	stdout_handler.setFormatter(CustomLogFormat('%(asctime)s | ^COL_START^%(levelname)s^COL_END^	| %(name)s:	%(message)s'))
-	log.addHandler(stdout_handler)
-	return log
\ No newline at end of file
+	log.setLevel(LOG_LEVEL)
+	# Records are only put into the queue, the listener thread does the formatting and writing
+	queue_handler = QueueHandler(LOG_QUEUE)
+	queue_handler.setLevel(LOG_LEVEL)
+	log.addHandler(queue_handler)
+	return log
+
+
+# All loggers share one queue which is processed by a background thread
+LOG_QUEUE = queue.SimpleQueue()
+try:
+	# Batch the writes to stderr in a 64 KB buffer
+	LOG_STREAM = io.TextIOWrapper(
+		io.BufferedWriter(io.FileIO(sys.stderr.fileno(), 'wb', closefd=False), buffer_size=65536),
+		encoding=sys.stderr.encoding,
+		errors='backslashreplace'
+	)
+except (AttributeError, ValueError, io.UnsupportedOperation):
+	# stderr without a file descriptor (e.g. redirected by a test runner)
+	LOG_STREAM = sys.stderr
+stdout_handler = BufferedStreamHandler(LOG_STREAM)
+stdout_handler.setLevel(LOG_LEVEL)
+stdout_handler.setFormatter(CustomLogFormat())
+LOG_LISTENER = BufferedQueueListener(LOG_QUEUE, LOG_STREAM, stdout_handler)
+LOG_LISTENER.start()
+# Write all pending records before exit
+atexit.register(LOG_LISTENER.stop)
\ No newline at end of file
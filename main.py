@@ -2,11 +2,19 @@ import os
 import httpx
 import asyncio
 
+try:
+	# Faster event loop, not available on all platforms
+	import uvloop
+except ImportError:
+	uvloop = None
+
 # For .env file
 from dotenv import load_dotenv
 load_dotenv()
 
+from config import CONFIG
 from log_config import getNewLogger
+from utils import getHttpClient, closeHttpClient
 
 # Updaters
 import updaters
@@ -20,46 +28,52 @@ async def main():
 	logger.info(f'Updater main() started')
 
 	# Check data folder
-	p = os.environ.get('data_folder')
-	if os.path.exists(p) == False:
-		logger.info(f'Create output data folter {p}')
-		os.makedirs(p)
-
-	configuredUpdaters = []
+	p = CONFIG.data_folder
+	if not os.path.isdir(p):
+		logger.info(f'Create output data folder {p}')
+	os.makedirs(p, exist_ok=True)
 
 	try:
 		# Try to find the auth token
-		TOKEN_PATH = os.environ.get('token_path')
+		TOKEN_PATH = CONFIG.token_path
 		authToken:str = None
 		if os.path.exists(TOKEN_PATH):
-			with open(TOKEN_PATH, 'r') as f:
-				authToken = f.readline()
+			# Only the first line of the small key file is needed, read it without a buffered text stream
+			fd = os.open(TOKEN_PATH, os.O_RDONLY)
+			try:
+				raw = os.read(fd, 4096)
+			finally:
+				os.close(fd)
+			authToken = raw.split(b'\n', 1)[0].decode('utf-8').strip() or None
 
 		if not authToken:
 			raise Exception('No auth token found!')
 
 		logger.info(f'found auth token {authToken[:4]}...{authToken[-4:]}')
 
-		# Try connection to backend
-		client = AscentradeClient(
-			os.environ.get('graphql_host'),
-			http_client=httpx.AsyncClient(timeout=60.0),
-			headers={'x-auth-token':authToken}
-		)
-
-		result = await client.ping()
-		if result.ping == 'pong':
-			logger.info('successfully connected to backend')
-
-		# EOD updater
-		eodApiKey = os.environ.get('eod_api_key')
-		if eodApiKey != None and len(eodApiKey) > 0:
-			eodUpdater = updaters.EODUpdater(eodApiKey, authToken)
-			configuredUpdaters.append(asyncio.create_task(eodUpdater.run()))
-
-		# Await all configured updaters
-		await asyncio.gather(*configuredUpdaters)
-		logger.info(f'All updater tasks stopped')
+		# Main and all updaters share one connection pool
+		try:
+			# Try connection to backend, the headers argument of AscentradeClient is ignored for a given http_client
+			client = AscentradeClient(
+				CONFIG.graphql_host,
+				http_client=getHttpClient({'x-auth-token':authToken})
+			)
+
+			result = await client.ping()
+			if result.ping == 'pong':
+				logger.info('successfully connected to backend')
+
+			# Run all configured updaters, a failing updater cancels the others
+			async with asyncio.TaskGroup() as tg:
+				# EOD updater
+				eodApiKey = CONFIG.eod_api_key
+				if eodApiKey != None:
+					eodUpdater = updaters.EODUpdater(eodApiKey, authToken)
+					tg.create_task(eodUpdater.run())
+
+			logger.info(f'All updater tasks stopped')
+		finally:
+			await closeHttpClient()
 
 	except (httpx.ConnectError, httpx.ReadTimeout):
 		logger.error('No connection to backend client, exit!')
@@ -70,4 +84,7 @@ async def main():
 
 
 if __name__ == '__main__':
-	asyncio.run(main())
\ No newline at end of file
+	if uvloop != None:
+		uvloop.run(main())
+	else:
+		asyncio.run(main())
\ No newline at end of file
@@ -21,29 +21,26 @@
 
 import time
 from asyncio import sleep
-from datetime import datetime, timezone
+from datetime import datetime
 
 
-async def pauseUntil(dt:datetime, wakeupInterval=60) -> bool:
+async def pauseUntil(dt:datetime) -> bool:
 	"""Pause program execution in an async way
 
 	Args:
-		dt (datetime): datetime object how long to sleep
-		wakeupInterval (int, optional): Seconds to check timestamp again. Defaults to 60.
+		dt (datetime): datetime object how long to sleep, naive datetimes are local time
+
+	Raises:
+		asyncio.CancelledError: If the sleep gets cancelled
 
 	Returns:
-		bool: True if sleep finished, otherwise False (on cancel)
+		bool: True if sleep finished, otherwise False (on invalid datetime)
 	"""
 	try:
-		end = dt.astimezone(timezone.utc).timestamp()
-		while True:
-			now = time.time()
-			diff = end - now
-			if diff <= 0:
-				break
-			else:
-				await sleep(wakeupInterval)
-		return True
-	except:
-		pass
-	return False
\ No newline at end of file
+		# timestamp() handles aware datetimes and naive local datetimes without an astimezone() conversion
+		end = dt.timestamp()
+	except (OverflowError, ValueError, OSError):
+		return False
+
+	await sleep(max(0, end - time.time()))
+	return True
\ No newline at end of file
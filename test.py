@@ -39,6 +39,79 @@ class TestSplitParse(unittest.TestCase):
 		with self.assertRaises(Exception):
 			parseSplit('A/20')
 
+	def test_cache(self):
+		self.assertIs(parseSplit('2.000000/1.000000'), parseSplit('2.000000/1.000000'))
+
+class TestParseBoolean(unittest.TestCase):
+
+	def test_true(self):
+		for value in (True, '1', 'true', 'True', 'T', 'yes', 'Y'):
+			self.assertTrue(parseBoolean(value), value)
+
+	def test_false(self):
+		for value in (False, None, '', '0', 'false', 'no', 'truee', 1):
+			self.assertFalse(parseBoolean(value), value)
+
+
+class TestDividendPeriod(unittest.TestCase):
+
+	def test_valid(self):
+		self.assertEqual(parseDividendPeriod('Quarterly'), 'Quarterly')
+		self.assertEqual(parseDividendPeriod('semiannual'), 'SemiAnnual')
+		self.assertEqual(parseDividendPeriod('MONTHLY'), 'Monthly')
+
+	def test_other(self):
+		self.assertEqual(parseDividendPeriod(None), 'Other')
+		self.assertEqual(parseDividendPeriod(''), 'Other')
+		self.assertEqual(parseDividendPeriod('Biweekly'), 'Other')
+		self.assertEqual(parseDividendPeriod(4), 'Other')
+
+class TestRenameListDictKeys(unittest.TestCase):
+
+	def test_rename(self):
+		quotes = [{'date': '2024-01-01', 'open': 1}, {'date': '2024-01-02', 'close': 2}]
+		renamed = renameListDictKeys(quotes, {'open': 'split_adjusted_open', 'close': 'split_adjusted_close', 'high': 'split_adjusted_high'})
+		self.assertEqual(renamed, [{'date': '2024-01-01', 'split_adjusted_open': 1}, {'date': '2024-01-02', 'split_adjusted_close': 2}])
+
+	def test_empty(self):
+		self.assertEqual(renameListDictKeys([], {'open': 'o'}), [])
+
+
+class TestJsonPath(unittest.TestCase):
+
+	def test_values(self):
+		data = {'General': {'Code': 'AAPL'}, 'outstandingShares': {'annual': {'0': {'shares': 1}, '1': {'shares': 2}}}}
+		self.assertEqual(getJsonPathData(data, '$.General.Code'), 'AAPL')
+		self.assertEqual(getJsonPathData(data, '$.outstandingShares.annual.*'), [{'shares': 1}, {'shares': 2}])
+		self.assertEqual(getJsonPathData(data, '$.General.Name', 'default'), 'default')
+
+	def test_dpath(self):
+		data = {'General': {'Code': 'AAPL', 'LogoURL': None}, 'Highlights': []}
+		self.assertEqual(dpath(data, 'General', 'Code'), 'AAPL')
+		self.assertIsNone(dpath(data, 'General', 'LogoURL', default='default'))
+		self.assertEqual(dpath(data, 'General', 'Name', default='default'), 'default')
+		self.assertEqual(dpath(data, 'Highlights', 'PERatio', default=0), 0)
+
+	def test_cache(self):
+		self.assertIs(compileJsonPath('$.General.Code'), compileJsonPath('$.General.Code'))
+
+	def test_compiled(self):
+		path = compileJsonPath('$.General.Code')
+		self.assertEqual(getJsonPathData({'General': {'Code': 'AAPL'}}, path), 'AAPL')
+		self.assertEqual(getJsonPathData({}, path, 'default'), 'default')
+
+
+class TestCheckDateString(unittest.TestCase):
+
+	def test_valid(self):
+		self.assertEqual(checkDateString('2024-03-31'), '2024-03-31')
+		self.assertEqual(checkDateString('20240331'), '2024-03-31')
+
+	def test_invalid(self):
+		self.assertIsNone(checkDateString('0000-00-00'))
+		self.assertIsNone(checkDateString(None))
+		self.assertIsNone(checkDateString(['2024-03-31']))
+
 if __name__ == '__main__':
 	# Do not run this code by using Visual Studio, instead run ```python test.py```
 	unittest.main(verbosity=2)
\ No newline at end of file
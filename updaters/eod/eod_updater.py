@@ -20,66 +20,162 @@
 """
 
 import os
-import simplejson as json
-import pause
+import json
+import httpx
+import orjson
 import base64
 import asyncio
-import aiofiles
 import pandas as pd
-from io import StringIO
 from decimal import Decimal
 from datetime import date, datetime, timedelta
 
 from .eodhd_async import EODHDAsyncClient
 from .eod_websocket import EodWebsocket, EodWsType
 
-from utils import parseSplit, parseBoolean, parseInt, getJsonPathData, parseDividendPeriod, checkDateString
-from updaters import UpdaterBase
+from config import CONFIG
+from utils import parseSplit, parseBoolean, parseInt, dpath, parseDividendPeriod, checkDateString
+from updaters import UpdaterBase, QueueObject
+from updaters.updater_base import SECURITY_BATCH_SIZE
+from pause import pauseUntil
 
 from tickers import TOP_US_STOCKS, TOP_US_ETFS
 
+# Maximum number of bulk rows sent to the backend by one batch of tasks
+BULK_CHUNK_SIZE = 256
+
+# Fundamentals fields for the security update: (field, path in the EOD fundamentals JSON, default)
+FUNDAMENTAL_FIELDS = [
+	('figi', ('General', 'OpenFigi'), None),
+	('isin', ('General', 'ISIN'), None),
+	('lei', ('General', 'LEI'), None),
+	('cusip', ('General', 'CUSIP'), None),
+	('cik', ('General', 'CIK'), None),
+	('ipo_date', ('General', 'IPODate'), None),
+	('is_delisted', ('General', 'IsDelisted'), False),
+	('description', ('General', 'Description'), None),
+	('marketcap', ('Highlights', 'MarketCapitalization'), None),
+	('beta', ('Technicals', 'Beta'), None),
+	('shares_outstanding', ('SharesStats', 'SharesOutstanding'), None),
+	('shares_float', ('SharesStats', 'SharesFloat'), None),
+	('shares_short', ('Technicals', 'SharesShort'), None),
+	('short_ratio', ('Technicals', 'ShortRatio'), None),
+	#('short_percent_outstanding', (), None),
+	#('short_percent_float', (), None),
+	('url', ('General', 'WebURL'), None),
+	('sector', ('General', 'Sector'), None),
+	('industry', ('General', 'Industry'), None),
+	# TODO: Parse GICS Code
+	('ebitda', ('Highlights', 'EBITDA'), None),
+	('pe_ratio', ('Highlights', 'PERatio'), None),
+	('wallstreet_target_price', ('Highlights', 'WallStreetTargetPrice'), None),
+	('book_value', ('Highlights', 'BookValue'), None),
+	('dividend_share', ('Highlights', 'DividendShare'), None),
+	('dividend_yield', ('Highlights', 'DividendYield'), None),
+	('earnings_share', ('Highlights', 'EarningsShare'), None),
+	('eps_estimate_current_year', ('Highlights', 'EPSEstimateCurrentYear'), None),
+	('eps_estimate_next_year', ('Highlights', 'EPSEstimateNextYear'), None),
+	('eps_estimate_next_quarter', ('Highlights', 'EPSEstimateNextQuarter'), None),
+	('eps_estimate_current_quarter', ('Highlights', 'EPSEstimateCurrentQuarter'), None),
+	('most_recent_quarter', ('Highlights', 'MostRecentQuarter'), None),
+	('profit_margin', ('Highlights', 'ProfitMargin'), None),
+	('operating_margin_ttm', ('Highlights', 'OperatingMarginTTM'), None),
+	('return_on_assets_ttm', ('Highlights', 'ReturnOnAssetsTTM'), None),
+	('return_on_equity_ttm', ('Highlights', 'ReturnOnEquityTTM'), None),
+	('revenue_ttm', ('Highlights', 'RevenueTTM'), None),
+	('revenue_per_share_ttm', ('Highlights', 'RevenuePerShareTTM'), None),
+	('quarterly_revenue_growth_yoy', ('Highlights', 'QuarterlyRevenueGrowthYOY'), None),
+	('gross_profit_ttm', ('Highlights', 'GrossProfitTTM'), None),
+	('diluted_eps_ttm', ('Highlights', 'DilutedEpsTTM'), None),
+	('quarterly_earnings_growth_yoy', ('Highlights', 'QuarterlyEarningsGrowthYOY'), None),
+	('forward_pe', ('Valuation', 'ForwardPE'), None),
+	('price_sales_ttm', ('Valuation', 'PriceSalesTTM'), None),
+	('price_book_mrq', ('Valuation', 'PriceBookMRQ'), None),
+	('enterprise_value', ('Valuation', 'EnterpriseValue'), None),
+	('enterprise_value_revenue', ('Valuation', 'EnterpriseValueRevenue'), None),
+	('enterprise_value_ebitda', ('Valuation', 'EnterpriseValueEbitda'), None),
+]
+
+
+def jsonDefault(obj):
+	"""orjson serializer for types without native support
+
+	Args:
+		obj: Object to serialize
+
+	Raises:
+		TypeError: If the type is not supported
+
+	Returns:
+		orjson.Fragment: Decimal as raw JSON number
+	"""
+	if isinstance(obj, Decimal):
+		# Keep the exact number like simplejson did
+		return orjson.Fragment(str(obj))
+	raise TypeError(f'Type {type(obj)} is not JSON serializable')
+
+
+def dumpJson(data) -> bytes:
+	"""Serialize EODHD data with orjson
+
+	Args:
+		data: JSON data, may contain Decimal values
+
+	Returns:
+		bytes: Serialized JSON
+	"""
+	return orjson.dumps(data, default=jsonDefault, option=orjson.OPT_NON_STR_KEYS|orjson.OPT_SERIALIZE_NUMPY)
+
 
 class EODUpdater(UpdaterBase):
 	"""Updater for EOD Historical Data https://eodhd.com/
 	"""
 
-	def __init__(self, eodApiKey:str, authToken:str):
-		# Init base class with updater name and the global auth token
-		super().__init__('EOD', authToken)
-		self.eodAsyncClient = EODHDAsyncClient(eodApiKey)
+	def __init__(self, eodApiKey:str, authToken:str, transport:httpx.AsyncBaseTransport=None):
+		# Init base class with updater name, the global auth token and the shared HTTP transport
+		super().__init__('EOD', authToken, transport)
+		# EODHD requests use the same connection pool as the backend client
+		self.eodAsyncClient = EODHDAsyncClient(eodApiKey, self.httpClient)
 		self.websocket = EodWebsocket(eodApiKey)
-		self.tickersToUpdate = []
+		self.tickersToUpdate:dict[str, dict] = {}
 		self.firstRun = True
 
 		# Parse API usage limit
 		self.eodApiLimitReserve = parseInt(os.environ.get('eod_api_limit_reserve'), 10000)
+		# Limit the number of parallel full updates to respect the EOD rate limit
+		self.eodConcurrency = max(1, parseInt(os.environ.get('eod_concurrency'), 8))
+		self.fullUpdateSemaphore = asyncio.Semaphore(self.eodConcurrency)
+		# Limit the number of parallel backend requests for bulk updates
+		self.graphqlConcurrency = max(1, parseInt(os.environ.get('graphql_concurrency'), 16))
+		self.backendSemaphore = asyncio.Semaphore(self.graphqlConcurrency)
+		self.historyTasks:set[asyncio.Task] = set()
+		self.loadSettings()
 
 		# Create output folder
 		subfolders = ['fundamentals', 'quotes', 'quotes-split-adjusted']
-		self.basePath = os.path.join(os.environ.get('data_folder'), self.name)
-		if os.path.exists(self.basePath) == False:
-			self.logger.info(f'Create EOD output folder {self.basePath}')
-			os.makedirs(self.basePath)
+		self.basePath = os.path.join(CONFIG.data_folder, self.name)
 		for f in subfolders:
+			# Also creates the EOD output folder itself
 			fp = os.path.join(self.basePath, f)
-			if os.path.exists(fp) == False:
+			if not os.path.isdir(fp):
 				self.logger.info(f'Create folder {fp}')
-				os.makedirs(fp)
+			os.makedirs(fp, exist_ok=True)
 
 
 	async def writeDataToFile(self, data:json, folder:str, filename:str):
-		"""Dump JSON response to file
+		"""Dump JSON response to file, the file is written in the background by the **fileWriter** task
 
 		Args:
-			data (json): JSON to write
+			data (json | bytes): JSON to write, bytes (raw API response) are written as they are
 			folder (str): Sub folder name to write the file
 			filename (str): Filename without .json extension
 		"""
 		try:
 			path = os.path.join(self.basePath, folder, f'{filename}.json')
-			async with aiofiles.open(path, 'w') as f:
-				await f.write(json.dumps(data))
-				await f.flush()
+			if isinstance(data, bytes):
+				await self.queueFile(path, data)
+			else:
+				# Serialize in a worker thread, large fundamentals would block the event loop
+				await self.queueFile(path, await asyncio.to_thread(dumpJson, data))
 		except Exception as e:
 			self.logger.error(f'Error while writing to file {folder}/{filename}')
 			self.logger.error(e)
@@ -93,18 +189,15 @@ class EODUpdater(UpdaterBase):
 			exchange (str): Exchange symbol like 'NASDAQ' for US stocks 'US' is also valid
 		"""
 		if symbol != None and exchange != None:
+			symbol = symbol.upper()
+			exchange = exchange.upper()
 			o = {
-				'symbol': symbol.upper(),
-				'exchange': exchange.upper(),
-				'ticker': f'{symbol.upper()}.{exchange.upper()}'
+				'symbol': symbol,
+				'exchange': exchange,
+				'ticker': f'{symbol}.{exchange}'
 			}
-
-			with self.lock:
-				for e in self.tickersToUpdate:
-					if e['ticker'] == o['ticker']:
-						return
-
-				self.tickersToUpdate.append(o)
+			# No lock needed, there is no await between lookup and insert
+			self.tickersToUpdate.setdefault(o['ticker'], o)
 
 
 	async def processLogo(self, logoUrl:str) -> str:
@@ -120,17 +213,14 @@ class EODUpdater(UpdaterBase):
 		try:
 			imgBytes = await self.eodAsyncClient.downloadLogo(logoUrl)
 			if imgBytes != None:
-				logoBase64 = base64.encodebytes(imgBytes).decode("utf-8").replace('\n','').replace('\r', '')
+				logoBase64 = base64.b64encode(imgBytes).decode('ascii')
 				# Save logo PNG file
-				path = os.path.join(os.environ.get('data_folder'), '.'+os.path.dirname(logoUrl))
-				if not os.path.exists(path):
-					os.makedirs(path)
+				path = os.path.join(CONFIG.data_folder, '.'+os.path.dirname(logoUrl))
+				os.makedirs(path, exist_ok=True)
 				filename = logoUrl.split('/')[-1]
 				writePath = os.path.join(path, filename)
-				self.logger.debug(f'Try to write logo image to {writePath}')
-				async with aiofiles.open(writePath, 'wb') as f:
-					await f.write(imgBytes)
-					await f.flush()
+				self.logger.debug(f'Queue logo image for {writePath}')
+				await self.queueFile(writePath, imgBytes)
 		except Exception as e:
 			self.logger.warning(f'Unable to get logo {logoUrl}')
 			self.logger.warning(e)
@@ -147,67 +237,99 @@ class EODUpdater(UpdaterBase):
 		Returns:
 			bool: Return True if all updates where successful
 		"""
-		try:
-			eodTicker = symbol + '.' + exchangeCode
-			self.logger.info(f'Start full update for {eodTicker}')
-
+		# Parallel full updates are limited by the semaphore
+		async with self.fullUpdateSemaphore:
 			try:
-				# Fundamentals update
-				fundamentals = await self.eodAsyncClient.getFundamentals(eodTicker)
-				if fundamentals == None:
-					self.logger.warning(f'Got no fundamentals data for {symbol}.{exchangeCode}')
-					return False
+				eodTicker = symbol + '.' + exchangeCode
+				self.logger.info(f'Start full update for {eodTicker}')
+
+				try:
+					# Fundamentals update
+					# Get the raw response, it is written to the file without serializing it again
+					fundamentalsContent = await self.eodAsyncClient.getFundamentals(eodTicker, raw=True)
+					if fundamentalsContent == None:
+						self.logger.warning(f'Got no fundamentals data for {symbol}.{exchangeCode}')
+						return False
+					fundamentals = self.eodAsyncClient.parseJson(fundamentalsContent)
 				
-				# Try to download company logo
-				logoBase64 = None
-				logoUrl = getJsonPathData(fundamentals, '$.General.LogoURL', None)
-				if logoUrl != None:
-					logoBase64 = await self.processLogo(logoUrl)
-
-				# Queue fundamentals
-				await self.queueObject('fundamentals', fundamentals, {'logo_base64': logoBase64, 'logo_url': logoUrl})
-				# Save JSON file
-				await self.writeDataToFile(fundamentals, 'fundamentals', eodTicker)
-			except Exception as e:
-				self.logger.error(f'Error while getting fundamentals for {eodTicker}')
-				self.logger.error(e)
+					# Try to download company logo
+					logoBase64 = None
+					logoUrl = dpath(fundamentals, 'General', 'LogoURL')
+					if logoUrl != None:
+						logoBase64 = await self.processLogo(logoUrl)
+
+					# Queue fundamentals
+					await self.queueObject('fundamentals', fundamentals, {'logo_base64': logoBase64, 'logo_url': logoUrl})
+					# Save JSON file
+					await self.writeDataToFile(fundamentalsContent, 'fundamentals', eodTicker)
+				except Exception as e:
+					self.logger.error(f'Error while getting fundamentals for {eodTicker}')
+					self.logger.error(e)
+
+				# Historical quotes (adjusted and raw)
+				try:
+					# [{'date': '2024-04-16', 'open': 171.71, 'high': 173.755, 'low': 168.27, 'close': 169.38, 'adjusted_close': 169.38, 'volume': 72646896}]
+					self.logger.debug(f'Update end of day quotes for {eodTicker}')
+					quotesContent = await self.eodAsyncClient.getHistoricalQuotes(eodTicker, raw=True)
+					await self.writeDataToFile(quotesContent, 'quotes', eodTicker)
+					splitQuotesContent = await self.eodAsyncClient.getSplitAdjustedQuotes(eodTicker, raw=True)
+					await self.writeDataToFile(splitQuotesContent, 'quotes-split-adjusted', eodTicker)
+					quotes = self.eodAsyncClient.parseJson(quotesContent)
+					splitQuotes = self.eodAsyncClient.parseJson(splitQuotesContent)
+					self.logger.debug(f'Got {len(quotes)} quotes and {len(splitQuotes)} split-adjusted quotes for {eodTicker}')
+					# Put the data into the queue
+					await self.queueObject('quotes', {'quotes':quotes, 'splitAdjusted':splitQuotes}, {'code': symbol, 'exchange_code': exchangeCode})
+				except Exception as e:
+					self.logger.error(f'Error while getting historical quotes for {eodTicker}')
+					self.logger.error(e)
+
+				# Historical Dividends
+				try:
+					dividends = await self.eodAsyncClient.getHistoricalDividends(eodTicker)
+					await self.queueObject('dividends', dividends, {'code': symbol, 'exchange_code': exchangeCode})
+				except Exception as e:
+					self.logger.error(f'Error while getting historical dividends for {eodTicker}')
+					self.logger.error(e)
 
-			# Historical quotes (adjusted and raw)
-			try:
-				# [{'date': '2024-04-16', 'open': 171.71, 'high': 173.755, 'low': 168.27, 'close': 169.38, 'adjusted_close': 169.38, 'volume': 72646896}]
-				self.logger.debug(f'Update end of day quotes for {eodTicker}')
-				quotes = await self.eodAsyncClient.getHistoricalQuotes(eodTicker)
-				await self.writeDataToFile(quotes, 'quotes', eodTicker)
-				splitQuotes = await self.eodAsyncClient.getSplitAdjustedQuotes(eodTicker)
-				await self.writeDataToFile(splitQuotes, 'quotes-split-adjusted', eodTicker)
-				self.logger.debug(f'Got {len(quotes)} quotes and {len(splitQuotes)} split-adjusted quotes for {eodTicker}')
-				# Put the data into the queue
-				await self.queueObject('quotes', {'quotes':quotes, 'splitAdjusted':splitQuotes}, {'code': symbol, 'exchange_code': exchangeCode})
-			except Exception as e:
-				self.logger.error(f'Error while getting historical quotes for {eodTicker}')
-				self.logger.error(e)
+				# Historical Splits
+				try:
+					splits = await self.eodAsyncClient.getHistoricalSplits(eodTicker)
+					await self.queueObject('splits', splits, {'code': symbol, 'exchange_code': exchangeCode})
+				except Exception as e:
+					self.logger.error(f'Error while getting historical splits for {eodTicker}')
+					self.logger.error(e)
 
-			# Historical Dividends
-			try:
-				dividends = await self.eodAsyncClient.getHistoricalDividends(eodTicker)
-				await self.queueObject('dividends', dividends, {'code': symbol, 'exchange_code': exchangeCode})
+				return True
 			except Exception as e:
-				self.logger.error(f'Error while getting historical dividends for {eodTicker}')
+				self.logger.error(f'fullUpdate({symbol}.{exchangeCode}) failed!')
 				self.logger.error(e)
+			return False
 
-			# Historical Splits
-			try:
-				splits = await self.eodAsyncClient.getHistoricalSplits(eodTicker)
-				await self.queueObject('splits', splits, {'code': symbol, 'exchange_code': exchangeCode})
-			except Exception as e:
-				self.logger.error(f'Error while getting historical splits for {eodTicker}')
-				self.logger.error(e)
 
-			return True
-		except Exception as e:
-			self.logger.error(f'fullUpdate({symbol}.{exchangeCode}) failed!')
-			self.logger.error(e)
-		return False
+	async def fullUpdates(self, tickers:list[tuple[str, str]], name:str):
+		"""Run the full updates of several tickers in parallel and log the progress whenever one of them finishes
+
+		Args:
+			tickers (list[tuple[str, str]]): Symbol and exchange code of each ticker
+			name (str): Name of the tickers in the progress log, e.g. 'ETF stock'
+		"""
+		# Tasks are created in list order, the semaphore of fullUpdate starts them in that order
+		tasks = {asyncio.create_task(self.fullUpdate(symbol, exchangeCode)): f'{symbol}.{exchangeCode}' for symbol, exchangeCode in tickers}
+		pending = set(tasks)
+		finished = 0
+		try:
+			while len(pending) > 0:
+				done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+				for task in done:
+					finished += 1
+					if task.result() == True:
+						self.logger.info(f'Updated {name} {tasks[task]} - {finished}/{len(tasks)}')
+					else:
+						self.logger.warning(f'Update failed for {name} {tasks[task]} - {finished}/{len(tasks)}')
+		finally:
+			# Stop the remaining updates if the caller gets cancelled
+			for task in pending:
+				task.cancel()
 
 
 	async def getExchangeTickers(self, exchange='US', delisted=False):
@@ -224,8 +346,8 @@ class EODUpdater(UpdaterBase):
 				self.logger.info(f'got {len(exSymbols)} {"delisted" if delisted else ""} exchange tickers for {exchange}')
 				exSymbolsDf = pd.DataFrame(exSymbols)
 				# Filter relevant data (Stocks, ETFs)
-				exSymbolsDf.query("Type == 'Common Stock' or Type == 'ETF'", inplace=True)
-				exSymbolsDf['Type'] = exSymbolsDf['Type'].replace(['Common Stock'], 'Stock')
+				exSymbolsDf = exSymbolsDf.loc[exSymbolsDf['Type'].isin(('Common Stock', 'ETF'))].copy()
+				exSymbolsDf['Type'] = exSymbolsDf['Type'].map({'Common Stock': 'Stock', 'ETF': 'ETF'})
 				exSymbolsDf['is_delisted'] = delisted
 				# Map to correct column namnes
 				exSymbolsDf.rename({
@@ -237,8 +359,9 @@ class EODUpdater(UpdaterBase):
 					'Type':'type',
 					'Isin':'isin'
 				}, axis=1, inplace=True)
-				exSymbolsDf.reset_index(drop=True, inplace=True)
-				await self.queueObject('exchange-tickers', exSymbolsDf.to_json(), {'exchange':exchange})
+				# Queue plain dicts, missing values as None instead of NaN
+				exSymbolsDf = exSymbolsDf.astype(object).where(exSymbolsDf.notna(), None)
+				await self.queueObject('exchange-tickers', exSymbolsDf.to_dict(orient='records'), {'exchange':exchange})
 			else:
 				self.logger.warning(f'No exchange tickers!')
 		except Exception as e:
@@ -304,17 +427,30 @@ class EODUpdater(UpdaterBase):
 		Returns:
 			list: List with all tickers
 		"""
-		tickers = []
+		# dict keys as ordered set, keeps the order of the holdings
+		tickers = {}
 		try:
 			holdings:dict = data['ETF_Data']['Holdings']
 			for key, value in holdings.items():
 				# key: AAPL.US
 				# value: dict with 'Code' and 'Exchange'
-				if value['Code'] not in tickers:
-					tickers.append(value['Code'])
+				tickers[value['Code']] = None
 		except:
 			pass
-		return tickers
+		return list(tickers)
+
+
+	def loadSettings(self):
+		"""Read the update settings from the environment once instead of on every check
+		"""
+		self.addNewTicker = parseBoolean(os.environ.get('eod_add_new_ticker'))
+		self.updateDailyRun = parseBoolean(os.environ.get('eod_update_daily_run'))
+		self.updateDays = os.environ.get('eod_update_days')
+		self.updateDelisted = parseBoolean(os.environ.get('eod_update_delisted'))
+		self.initialRun = parseBoolean(os.environ.get('eod_initial_run'))
+		self.updateTopStocks = parseBoolean(os.environ.get('eod_update_top_stocks'))
+		self.updateTopEtfs = parseBoolean(os.environ.get('eod_update_top_etfs'))
+		self.updateOldest = parseBoolean(os.environ.get('eod_update_oldest'))
 
 
 	async def restGetter(self):
@@ -322,7 +458,8 @@ class EODUpdater(UpdaterBase):
 		"""
 		try:
 			self.logger.debug(f' start restGetter() task')
-			updatedTickers = []
+			updatedTickers:set[str] = set()
+			self.loadSettings()
 
 			# Update user data / API limits
 			await self.eodAsyncClient.getUserData()
@@ -333,7 +470,7 @@ class EODUpdater(UpdaterBase):
 
 			# Daily update
 			try:
-				if parseBoolean(os.environ.get('eod_update_daily_run')):
+				if self.updateDailyRun:
 					today = datetime.today()
 					# Monday (0) .. Sunday (6)
 					if today.weekday() in [1, 2, 3, 4, 5]:
@@ -353,7 +490,7 @@ class EODUpdater(UpdaterBase):
 			if self.firstRun == True:
 				daysToBulkUpdate = []
 				try:
-					strList = os.environ.get('eod_update_days').replace(' ', '').split(',')
+					strList = self.updateDays.replace(' ', '').split(',')
 					daysToBulkUpdate = [datetime.fromisoformat(e).date() for e in strList]
 					self.logger.info(f'Updating following days: {daysToBulkUpdate}')
 				except:
@@ -368,14 +505,14 @@ class EODUpdater(UpdaterBase):
 						# Bulk end of day dividends
 						await self.getBulkEodDividends(d)
 					except Exception as e:
-						self.logger.warning(f'Error while processing eod_update_days: {os.environ.get("eod_update_days")}')
+						self.logger.warning(f'Error while processing eod_update_days: {self.updateDays}')
 						self.logger.warning(e)
 
-				if parseBoolean(os.environ.get('eod_update_delisted')):
+				if self.updateDelisted:
 					# Load all delisted tickers
 					await self.getExchangeTickers(delisted=True)
 
-				if parseBoolean(os.environ.get('eod_initial_run')):
+				if self.initialRun:
 					# Update SPY, QQQ and IWM stocks on the first
 					self.logger.info('Start initial run, getting ETF data...')
 					spy = await self.eodAsyncClient.getFundamentals('SPY.US')
@@ -386,19 +523,16 @@ class EODUpdater(UpdaterBase):
 					etfTickers = etfTickers + self.extractEtfTickers(iwm)
 					etfTickers = etfTickers + ['XLE', 'XLF', 'XLU', 'XLI', 'GDX', 'XLK', 'XLV', 'XLP', 'XLB', 'XOP', 'IYR', 'XHB', 'ITB', 'VNQ', 'GDXJ', 'IYE', 'OIH', 'XME', 'XRT', 'SMH', 'IBB', 'KBE', 'KRE', 'XTL']
 
+					# Skip duplicates and already updated tickers
+					etfTickers = [stock for stock in dict.fromkeys(etfTickers) if stock not in updatedTickers]
 					self.logger.info(f'Do full update of {len(etfTickers)} ETF stocks...')
-					for idx, stock in enumerate(etfTickers):
-						# Skip if already updated
-						if stock in updatedTickers:
-							continue
-						self.logger.info(f'Update ETF stock {stock} - {idx+1}/{len(etfTickers)}')
-						await self.fullUpdate(stock, 'US')
-						updatedTickers.append(stock)
+					await self.fullUpdates([(stock, 'US') for stock in etfTickers], 'ETF stock')
+					updatedTickers.update(etfTickers)
 					
 					# Add the initial ETF fundamentals objects
 					etfFundamentals =  {'SPY':spy, 'QQQ':qqq, 'IWM':iwm}
 					for key, value in etfFundamentals.items():
-						updatedTickers.append(key)
+						updatedTickers.add(key)
 						# Queue fundamentals & save to file
 						await self.queueObject('fundamentals', value)
 						await self.writeDataToFile(value, 'fundamentals', f'{key}.US')
@@ -406,37 +540,42 @@ class EODUpdater(UpdaterBase):
 			# Do a full update of all stocks with splits or dividends
 			if len(self.tickersToUpdate) > 0:
 				self.logger.info(f'Do full update of {len(self.tickersToUpdate)} stocks...')
-				for idx, stock in enumerate(self.tickersToUpdate):
-					if parseBoolean(os.environ.get('eod_add_new_ticker')) == False and self.checkKnownTicker(stock['symbol'], stock['exchange']) == False:
-						continue
-					self.logger.info(f'Update stock {stock} - {idx+1}/{len(self.tickersToUpdate)}')
-					await self.fullUpdate(stock['symbol'], stock['exchange'])
-					updatedTickers.append(stock['symbol'])
+				stocks = [stock for stock in self.tickersToUpdate.values() if self.addNewTicker == True or self.checkKnownTicker(stock['symbol'], stock['exchange']) == True]
+				await self.fullUpdates([(stock['symbol'], stock['exchange']) for stock in stocks], 'stock')
+				updatedTickers.update(stock['symbol'] for stock in stocks)
 
-			if parseBoolean(os.environ.get('eod_update_top_stocks')):
+			if self.updateTopStocks:
 				self.logger.info(f'Start updating top US stocks')
-				for ticker in TOP_US_STOCKS:
-					await self.fullUpdate(ticker, 'US')
+				topStocks = [ticker for ticker in dict.fromkeys(TOP_US_STOCKS) if ticker not in updatedTickers]
+				await self.fullUpdates([(ticker, 'US') for ticker in topStocks], 'top stock')
+				updatedTickers.update(topStocks)
 			
-			if parseBoolean(os.environ.get('eod_update_top_etfs')):
+			if self.updateTopEtfs:
 				self.logger.info(f'Start updating top US ETFs')
-				for ticker in TOP_US_ETFS:
-					await self.fullUpdate(ticker, 'US')
+				topEtfs = [ticker for ticker in dict.fromkeys(TOP_US_ETFS) if ticker not in updatedTickers]
+				await self.fullUpdates([(ticker, 'US') for ticker in topEtfs], 'top ETF')
+				updatedTickers.update(topEtfs)
 
 			# Use the rest the available API calls to do more updates
-			if parseBoolean(os.environ.get('eod_update_oldest')):
+			if self.updateOldest:
 				# Get current tickers from backend
 				await self.updateTickers()
-				oldestTickers = self.allTickers.sort_values(by='last_update', ascending=True)
-				for idx, row in oldestTickers.iterrows():
-					stock = row.to_dict()
+				# Sort only the last_update column and read the other columns in that order
+				order = self.allTickers['last_update'].sort_values().index
+				oldestStocks = []
+				for code, exchange, delisted in zip(*(self.allTickers[c].loc[order].tolist() for c in ('code', 'virtual_exchange', 'is_delisted'))):
 					# Skip if already updated or delisted
-					if stock['code'] in updatedTickers or stock['is_delisted'] == True:
+					if code in updatedTickers or delisted == True:
 						continue
+					oldestStocks.append({'code': code, 'virtual_exchange': exchange})
+					updatedTickers.add(code)
 
+				# Update in waves of parallel updates and check the API limit after each wave
+				for idx in range(0, len(oldestStocks), self.eodConcurrency):
+					wave = oldestStocks[idx:idx+self.eodConcurrency]
 					# [AllSecurityTickersSecurities(id=42, code='AAPL', exchange=AllSecurityTickersSecuritiesExchange(code='NASDAQ', virtual_exchange='US'))]
-					await self.fullUpdate(stock['code'], stock['virtual_exchange'])
-					updatedTickers.append(stock['code'])
+					await asyncio.gather(*(self.fullUpdate(stock['code'], stock['virtual_exchange']) for stock in wave))
+					self.logger.info(f'Updated oldest stocks {idx+len(wave)}/{len(oldestStocks)}')
 
 					# Check if enough API calls left for the next update
 					await self.eodAsyncClient.getUserData()
@@ -453,7 +592,237 @@ class EODUpdater(UpdaterBase):
 			# All neccessary updates completed
 			if self.firstRun:
 				self.firstRun = False
-			self.tickersToUpdate = []
+			self.tickersToUpdate.clear()
+
+
+	async def updateBulkRows(self, rows:list[dict], exchangeKey:str, update) -> int:
+		"""Send the rows of a bulk file for all known tickers to the backend
+
+		Args:
+			rows (list[dict]): Bulk rows from EODHD
+			exchangeKey (str): Key of the exchange code in a row
+			update: Coroutine function to send one row
+
+		Returns:
+			int: Number of rows of known tickers
+		"""
+		# Most rows belong to unknown tickers, filter them before any task is created
+		knownRows = []
+		for row in rows:
+			try:
+				if self.checkKnownTicker(row['code'], row[exchangeKey]):
+					knownRows.append(row)
+			except Exception as e:
+				self.logger.error(f'Invalid bulk row {row}')
+				self.logger.error(e)
+
+		# Limit the number of tasks, independent of the size of the bulk file
+		for idx in range(0, len(knownRows), BULK_CHUNK_SIZE):
+			chunk = knownRows[idx:idx+BULK_CHUNK_SIZE]
+			results = await asyncio.gather(*(update(row) for row in chunk), return_exceptions=True)
+			for row, result in zip(chunk, results):
+				if isinstance(result, Exception):
+					self.logger.error(f'Error processing bulk data for {row}')
+					self.logger.error(result)
+		return len(knownRows)
+
+
+	async def updateBulkQuote(self, quote:dict):
+		"""Send one bulk end of day quote of a known ticker to the backend
+
+		Args:
+			quote (dict): Bulk quote from EODHD
+		"""
+		async with self.backendSemaphore:
+			result = await self.client.update_security_quotes({
+				'code': quote['code'],
+				'exchange_code': quote['exchange_short_name'],
+				'quotes': [{
+					'date': quote['date'],
+					'open': quote['open'],
+					'high': quote['high'],
+					'low': quote['low'],
+					'close': quote['close'],
+					'split_adjusted_open': quote['open'],
+					'split_adjusted_high': quote['high'],
+					'split_adjusted_low': quote['low'],
+					'split_adjusted_close': quote['close'],
+					'adjusted_close': quote['adjusted_close'],
+					'volume': quote['volume'],
+				}]
+			})
+		if result.update_security_quotes.success != True:
+			self.logger.warning(f'Bulk update not successful for {quote}')
+			self.logger.warning(result.update_security_quotes.error)
+
+
+	async def updateBulkSplit(self, split:dict):
+		"""Send one bulk split of a known ticker to the backend
+
+		Args:
+			split (dict): Bulk split from EODHD
+		"""
+		newDecimal, oldDecimal = parseSplit(split['split'])
+		async with self.backendSemaphore:
+			result = await self.client.update_splits({
+				'code': split['code'],
+				'exchange_code': split['exchange'],
+				'splits': [{
+					'date': split['date'],
+					'new': newDecimal,
+					'old': oldDecimal
+				}]
+			})
+		if result.update_splits.success != True:
+			self.logger.warning(f'Split update not successful for {split}')
+			self.logger.warning(result.update_splits.error)
+
+
+	async def updateBulkDividend(self, dividend:dict):
+		"""Send one bulk dividend of a known ticker to the backend
+
+		Args:
+			dividend (dict): Bulk dividend from EODHD
+		"""
+		async with self.backendSemaphore:
+			result = await self.client.update_dividends({
+				'code': dividend['code'],
+				'exchange_code': dividend['exchange'],
+				'dividends': [{
+					'date': dividend['date'],
+					'declaration_date': dividend['declarationDate'],
+					'record_date': dividend['recordDate'],
+					'payment_date': dividend['paymentDate'],
+					'period': parseDividendPeriod(dividend['period']),
+					# Passed through as is, the client sends Decimal values as strings anyway
+					'adjusted_value': dividend['dividend'],
+					'value': dividend['dividend'],
+				}]
+			})
+		if result.update_dividends.success != True:
+			self.logger.warning(f'Dividend update not successful for {dividend}')
+			self.logger.warning(result.update_dividends.error)
+
+
+	async def updateQuotes(self, qobj:QueueObject):
+		"""Merge the historical quotes with the split adjusted quotes of one security and send them to the backend
+
+		Args:
+			qobj (QueueObject): Queue object with 'quotes' and 'splitAdjusted' data
+		"""
+		try:
+			quotes = qobj.data['quotes']
+			if len(quotes) == 0:
+				return
+			# Merge both lists by date, take volume from split adjusted quotes
+			# The quote dicts are only used here, update them in place instead of copying
+			quotesByDate = {}
+			for quote in quotes:
+				quote.pop('volume', None)
+				quotesByDate[quote['date']] = quote
+			for quote in qobj.data['splitAdjusted']:
+				row = quotesByDate.setdefault(quote['date'], {'date': quote['date']})
+				row['split_adjusted_open'] = quote.get('open')
+				row['split_adjusted_high'] = quote.get('high')
+				row['split_adjusted_low'] = quote.get('low')
+				row['split_adjusted_close'] = quote.get('close')
+				row['volume'] = quote.get('volume')
+
+			# Like an outer join, every row has all fields (missing ones are None)
+			columns = dict.fromkeys((*quotes[0], 'split_adjusted_open', 'split_adjusted_high', 'split_adjusted_low', 'split_adjusted_close', 'volume'))
+			mergedQuotes = [quotesByDate[d] for d in sorted(quotesByDate)]
+			for row in mergedQuotes:
+				# Only dates missing in one of the lists lack fields
+				if len(row) < len(columns):
+					for key in columns:
+						row.setdefault(key, None)
+
+			# Add all together
+			data = {**qobj.context, 'quotes': mergedQuotes}
+			result = await self.client.update_security_quotes(data)
+			self.logger.debug(f'apiWriter result for quotes: {result}')
+		except Exception as e:
+			self.logger.warning(f'Unable to parse quotes for {qobj.context}')
+
+
+	async def updateDividends(self, qobj:QueueObject):
+		"""Send the historical dividends of one security to the backend
+
+		Args:
+			qobj (QueueObject): Queue object with the dividends from EODHD
+		"""
+		data = qobj.context	# contains code and exchange_code
+		if len(qobj.data) > 0:
+			data['dividends'] = []
+			for d in qobj.data:
+				try:
+					# {"date": "2012-08-09","declarationDate": "2012-07-24","recordDate": "2012-08-13","paymentDate": "2012-08-16","period": "Quarterly", "value": 0.0946,"unadjustedValue": 2.6488,"currency": "USD"}
+					d['declaration_date'] = d['declarationDate']
+					d['record_date'] = d['recordDate']
+					d['payment_date'] = d['paymentDate']
+					d['period'] = parseDividendPeriod(d['period'])
+					del d['declarationDate']
+					del d['recordDate']
+					del d['paymentDate']
+					del d['unadjustedValue']
+					del d['currency']
+					data['dividends'].append(d)
+				except Exception as e:
+					self.logger.warning(f'Unable to parse split {d} for {qobj.context}')
+
+			result = await self.client.update_dividends(data)
+			self.logger.debug(f'apiWriter result for quotes: {result}')
+
+
+	async def updateSplits(self, qobj:QueueObject):
+		"""Send the historical splits of one security to the backend
+
+		Args:
+			qobj (QueueObject): Queue object with the splits from EODHD
+		"""
+		data = qobj.context	# contains code and exchange_code
+		if len(qobj.data) > 0:
+			data['splits'] = []
+			for s in qobj.data:
+				try:
+					newDecimal, oldDecimal = parseSplit(s['split'])
+					s['old'] = oldDecimal
+					s['new'] = newDecimal
+					del s['split']
+					data['splits'].append(s)
+				except Exception as e:
+					self.logger.warning(f'Unable to parse split {s} for {qobj.context}')
+
+			result = await self.client.update_splits(data)
+			self.logger.debug(f'apiWriter result for quotes: {result}')
+
+
+	async def writeHistory(self, qobj:QueueObject):
+		"""Task started by **apiWriter** to send the quotes, dividends or splits of one security
+
+		Args:
+			qobj (QueueObject): Queue object of type 'quotes', 'dividends' or 'splits'
+		"""
+		try:
+			if qobj.type == 'quotes':
+				await self.updateQuotes(qobj)
+			elif qobj.type == 'dividends':
+				await self.updateDividends(qobj)
+			elif qobj.type == 'splits':
+				await self.updateSplits(qobj)
+		except Exception as e:
+			self.logger.error(f'Unable to update {qobj.type} for {qobj.context}')
+			self.logger.error(e)
+
+
+	def writeHistoryDone(self, task:asyncio.Task):
+		"""Done callback of the **writeHistory** tasks, also called if a task got cancelled before it started
+
+		Args:
+			task (asyncio.Task): Finished task
+		"""
+		self.historyTasks.discard(task)
+		self.backendSemaphore.release()
 
 
 	async def apiWriter(self):
@@ -464,96 +833,48 @@ class EODUpdater(UpdaterBase):
 			try:
 				qobj = await self.dequeueObject()
 
-				if qobj.type == 'quotes':
-					try:
-						quotesDf = pd.DataFrame(qobj.data['quotes'])
-						if len(quotesDf) == 0:
-							continue
-						# Take volume from split adjusted quotes
-						if 'volume' in quotesDf.columns.to_list():
-							del quotesDf['volume']
-						df = pd.DataFrame(qobj.data['splitAdjusted'])
-						df.rename(columns={
-							'open':'split_adjusted_open',
-							'high': 'split_adjusted_high',
-							'low': 'split_adjusted_low',
-							'close': 'split_adjusted_close'
-						}, inplace=True)
-
-						df = pd.merge(df, quotesDf, on='date', how='outer')
-						df.replace({float('nan'): None}, inplace=True)
-
-						# Add all together
-						data = {**qobj.context, **{'quotes':df.to_dict('records')}}
-						result = await self.client.update_security_quotes(data)
-						self.logger.debug(f'apiWriter result for quotes: {result}')
-					except Exception as e:
-						self.logger.warning(f'Unable to parse quotes for {qobj.context}')
-				
-				elif qobj.type == 'dividends':
-					data = qobj.context	# contains code and exchange_code
-					if len(qobj.data) > 0:
-						data['dividends'] = []
-						for d in qobj.data:
-							try:
-								# {"date": "2012-08-09","declarationDate": "2012-07-24","recordDate": "2012-08-13","paymentDate": "2012-08-16","period": "Quarterly", "value": 0.0946,"unadjustedValue": 2.6488,"currency": "USD"}
-								d['declaration_date'] = d['declarationDate']
-								d['record_date'] = d['recordDate']
-								d['payment_date'] = d['paymentDate']
-								d['period'] = parseDividendPeriod(d['period'])
-								del d['declarationDate']
-								del d['recordDate']
-								del d['paymentDate']
-								del d['unadjustedValue']
-								del d['currency']
-								data['dividends'].append(d)
-							except Exception as e:
-								self.logger.warning(f'Unable to parse split {d} for {qobj.context}')
+				if qobj.type in ('quotes', 'dividends', 'splits'):
+					# The history of different securities is independent, send it in parallel tasks.
+					# Fundamentals stay in order, so a new security exists before its history is sent.
+					await self.backendSemaphore.acquire()
+					task = asyncio.create_task(self.writeHistory(qobj))
+					# Keep a reference until the task is done
+					self.historyTasks.add(task)
+					task.add_done_callback(self.writeHistoryDone)
 
-						result = await self.client.update_dividends(data)
-						self.logger.debug(f'apiWriter result for quotes: {result}')
-				
-				elif qobj.type == 'splits':
-					data = qobj.context	# contains code and exchange_code
-					if len(qobj.data) > 0:
-						data['splits'] = []
-						for s in qobj.data:
-							try:
-								newDecimal, oldDecimal = parseSplit(s['split'])
-								s['old'] = oldDecimal
-								s['new'] = newDecimal
-								del s['split']
-								data['splits'].append(s)
-							except Exception as e:
-								self.logger.warning(f'Unable to parse split {s} for {qobj.context}')
-
-						result = await self.client.update_splits(data)
-						self.logger.debug(f'apiWriter result for quotes: {result}')
-				
 				elif qobj.type == 'exchange-tickers':
-					if parseBoolean(os.environ.get('eod_add_new_ticker')) == True:
-						exSymbolsDf = pd.read_json(StringIO(qobj.data))
-						self.logger.info(f'received {len(exSymbolsDf)} tickers')
+					if self.addNewTicker == True:
+						exSymbols = qobj.data
+						self.logger.info(f'received {len(exSymbols)} tickers')
+						# One timestamp for the whole batch
+						lastUpdate = datetime.now().isoformat()
 						# {'code': 'ACCA', 'name': 'Acacia Diversified Holdings Inc', 'country_alpha3': 'USA', 'exchange_code': 'PINK', 'currency_iso_code': 'USD', 'type': 'Stock', 'isin': 'US00389L1044'}
-						for index, row in exSymbolsDf.iterrows():
+						newSecurities = []
+						for sec in exSymbols:
 							try:
 								# {	'code', 'name', 'exchange_code', 'country_alpha3', 'currency_iso_code', 'type', 'isin', 'is_delisted' }
-								sec = row.to_dict()
-								sec['last_update'] = datetime.now().isoformat()
+								sec['last_update'] = lastUpdate
 								# Force unknown (mostly delisted stocks) on general US market
 								if sec['exchange_code'] == None or sec['exchange_code'] == '':
 									sec['exchange_code'] = 'US'
 								if self.checkKnownTicker(sec['code'], sec['exchange_code'], sec['is_delisted']):
 									continue
-
-								self.logger.debug(f'Update ticker {sec["code"]}.{sec["exchange_code"]}')
-								result = await self.client.update_security(sec)
-								if result.update_security.success != True:
-									self.logger.warning(f'Ticker update not successful for {sec}')
-									self.logger.warning(result.update_security.error)
+								newSecurities.append(sec)
 							except Exception as e:
-								self.logger.error(f'Unable to update security: {sec}')
+								self.logger.error(f'Unable to check security: {sec}')
 								self.logger.error(e)
+
+						# Add the new securities with one request per batch
+						for idx in range(0, len(newSecurities), SECURITY_BATCH_SIZE):
+							batch = newSecurities[idx:idx+SECURITY_BATCH_SIZE]
+							self.logger.debug(f'Update tickers {", ".join(sec["code"] for sec in batch)}')
+							results = await self.updateSecurities(batch)
+							for sec, result in zip(batch, results):
+								if result['success'] != True:
+									self.logger.warning(f'Ticker update not successful for {sec}')
+									self.logger.warning(result['error'])
+								else:
+									self.addKnownTicker(sec['code'], sec['exchange_code'], sec['is_delisted'])
 						# Get current tickers from backend
 						await self.updateTickers()
 					else:
@@ -562,89 +883,30 @@ class EODUpdater(UpdaterBase):
 				elif qobj.type == 'bulk-quotes':
 					bulkQuotes = qobj.data
 					self.logger.info(f'Update {len(bulkQuotes)} end of day quotes...')
-					for quote in bulkQuotes:
-						try:
-							if self.checkKnownTicker(quote['code'], quote['exchange_short_name']):
-								result = await self.client.update_security_quotes({
-									'code': quote['code'],
-									'exchange_code': quote['exchange_short_name'],
-									'quotes': [{
-										'date': quote['date'],
-										'open': quote['open'],
-										'high': quote['high'],
-										'low': quote['low'],
-										'close': quote['close'],
-										'split_adjusted_open': quote['open'],
-										'split_adjusted_high': quote['high'],
-										'split_adjusted_low': quote['low'],
-										'split_adjusted_close': quote['close'],
-										'adjusted_close': quote['adjusted_close'],
-										'volume': quote['volume'],
-									}]
-								})
-								if result.update_security_quotes.success != True:
-									self.logger.warning(f'Bulk update not successful for {quote}')
-									self.logger.warning(result.update_security_quotes.error)
-						except Exception as e:
-							self.logger.error(f'Error processing bulk quotes for {quote}')
+					known = await self.updateBulkRows(bulkQuotes, 'exchange_short_name', self.updateBulkQuote)
+					self.logger.debug(f'Sent {known} end of day quotes of known tickers')
 
 				elif qobj.type == 'bulk-splits':
 					splits = qobj.data
 					self.logger.info(f'Update {len(splits)} splits...')
-					for split in splits:
-						try:
-							if self.checkKnownTicker(split['code'], split['exchange']):
-								newDecimal, oldDecimal = parseSplit(split['split'])
-								
-								result = await self.client.update_splits({
-									'code': split['code'],
-									'exchange_code': split['exchange'],
-									'splits': [{
-										'date': split['date'],
-										'new': newDecimal,
-										'old': oldDecimal
-									}]
-								})
-								if result.update_splits.success != True:
-									self.logger.warning(f'Split update not successful for {split}')
-									self.logger.warning(result.update_splits.error)
-						except Exception as e:
-							self.logger.error(e)
+					known = await self.updateBulkRows(splits, 'exchange', self.updateBulkSplit)
+					self.logger.debug(f'Sent {known} splits of known tickers')
 
 				elif qobj.type == 'bulk-dividends':
 					dividends = qobj.data
 					self.logger.info(f'Update {len(dividends)} dividends...')
-					for dividend in dividends:
-						try:
-							if self.checkKnownTicker(dividend['code'], dividend['exchange']):
-								result = await self.client.update_dividends({
-									'code': dividend['code'],
-									'exchange_code': dividend['exchange'],
-									'dividends': [{
-										'date': dividend['date'],
-										'declaration_date': dividend['declarationDate'],
-										'record_date': dividend['recordDate'],
-										'payment_date': dividend['paymentDate'],
-										'period': parseDividendPeriod(dividend['period']),
-										'adjusted_value': Decimal(dividend['dividend']),
-										'value': Decimal(dividend['dividend']),
-									}]
-								})
-								if result.update_dividends.success != True:
-									self.logger.warning(f'Dividend update not successful for {dividend}')
-									self.logger.warning(result.update_dividends.error)
-						except Exception as e:
-							self.logger.error(e)
+					known = await self.updateBulkRows(dividends, 'exchange', self.updateBulkDividend)
+					self.logger.debug(f'Sent {known} dividends of known tickers')
 
 				elif qobj.type == 'fundamentals':
 					data = qobj.data
 					secData = qobj.context		# already contains logo_base64 and logo_url
 
 					# Extract other information from JSON
-					secData['code'] = getJsonPathData(data, '$.General.Code', None)
-					secData['type'] = getJsonPathData(data, '$.General.Type', None).replace('Common ', '')
-					secData['name'] = getJsonPathData(data, '$.General.Name', None)
-					secData['exchange_code'] = getJsonPathData(data, '$.General.Exchange', None)
+					secData['code'] = dpath(data, 'General', 'Code')
+					secData['type'] = dpath(data, 'General', 'Type').replace('Common ', '')
+					secData['name'] = dpath(data, 'General', 'Name')
+					secData['exchange_code'] = dpath(data, 'General', 'Exchange')
 					# Some fundamentals have no exchange_code -> skip
 					if secData['exchange_code'] == None or secData['exchange_code'] == '':
 						self.logger.warning(f'Skip fundamental update for ticker {secData["code"]}, no exchange_code given!')
@@ -656,79 +918,37 @@ class EODUpdater(UpdaterBase):
 						continue
 
 					# Check if new tickers should be added
-					if parseBoolean(os.environ.get('eod_add_new_ticker')) == False and self.checkKnownTicker(secData['code'], secData['exchange_code']) == False:
+					if self.addNewTicker == False and self.checkKnownTicker(secData['code'], secData['exchange_code']) == False:
 						self.logger.warning(f'Ignore ticker {secData["code"]}.{secData["exchange_code"]}, environment variable eod_add_new_ticker=false')
 						continue
 
-					secData['currency_iso_code'] = getJsonPathData(data, '$.General.CurrencyCode', None)
-					secData['country_alpha3'] = getJsonPathData(data, '$.General.CountryName', None)
+					secData['currency_iso_code'] = dpath(data, 'General', 'CurrencyCode')
+					secData['country_alpha3'] = dpath(data, 'General', 'CountryName')
 
 					secData['last_update'] = datetime.now().isoformat()
 
-					secData['figi'] = getJsonPathData(data, '$.General.OpenFigi', None)
-					secData['isin'] = getJsonPathData(data, '$.General.ISIN', None)
-					secData['lei'] = getJsonPathData(data, '$.General.LEI', None)
-					secData['cusip'] = getJsonPathData(data, '$.General.CUSIP', None)
-					secData['cik'] = getJsonPathData(data, '$.General.CIK', None)
-
-					secData['ipo_date'] = getJsonPathData(data, '$.General.IPODate', None)
-					secData['is_delisted'] = getJsonPathData(data, '$.General.IsDelisted', False)
-					secData['description'] = getJsonPathData(data, '$.General.Description', None)
-					secData['marketcap'] = getJsonPathData(data, '$.Highlights.MarketCapitalization', None)
-					secData['beta'] = getJsonPathData(data, '$.Technicals.Beta', None)
-					secData['shares_outstanding'] = getJsonPathData(data, '$.SharesStats.SharesOutstanding', None)
-					secData['shares_float'] = getJsonPathData(data, '$.SharesStats.SharesFloat', None)
-					secData['shares_short'] = getJsonPathData(data, '$.Technicals.SharesShort', None)
-					secData['short_ratio'] = getJsonPathData(data, '$.Technicals.ShortRatio', None)
-					#secData['short_percent_outstanding'] = getJsonPathData(data, '$.', None)
-					#secData['short_percent_float'] = getJsonPathData(data, '$.', None)
-					secData['url'] = getJsonPathData(data, '$.General.WebURL', None)
-					secData['sector'] = getJsonPathData(data, '$.General.Sector', None)
-					secData['industry'] = getJsonPathData(data, '$.General.Industry', None)
-					# TODO: Parse GICS Code
-					secData['ebitda'] = getJsonPathData(data, '$.Highlights.EBITDA', None)
-					secData['pe_ratio'] = getJsonPathData(data, '$.Highlights.PERatio', None)
-					secData['wallstreet_target_price'] = getJsonPathData(data, '$.Highlights.WallStreetTargetPrice', None)
-					secData['book_value'] = getJsonPathData(data, '$.Highlights.BookValue', None)
-					secData['dividend_share'] = getJsonPathData(data, '$.Highlights.DividendShare', None)
-					secData['dividend_yield'] = getJsonPathData(data, '$.Highlights.DividendYield', None)
-					secData['earnings_share'] = getJsonPathData(data, '$.Highlights.EarningsShare', None)
-					secData['eps_estimate_current_year'] = getJsonPathData(data, '$.Highlights.EPSEstimateCurrentYear', None)
-					secData['eps_estimate_next_year'] = getJsonPathData(data, '$.Highlights.EPSEstimateNextYear', None)
-					secData['eps_estimate_next_quarter'] = getJsonPathData(data, '$.Highlights.EPSEstimateNextQuarter', None)
-					secData['eps_estimate_current_quarter'] = getJsonPathData(data, '$.Highlights.EPSEstimateCurrentQuarter', None)
-					secData['most_recent_quarter'] = checkDateString(getJsonPathData(data, '$.Highlights.MostRecentQuarter', None))
-					secData['profit_margin'] = getJsonPathData(data, '$.Highlights.ProfitMargin', None)
-					secData['operating_margin_ttm'] = getJsonPathData(data, '$.Highlights.OperatingMarginTTM', None)
-					secData['return_on_assets_ttm'] = getJsonPathData(data, '$.Highlights.ReturnOnAssetsTTM', None)
-					secData['return_on_equity_ttm'] = getJsonPathData(data, '$.Highlights.ReturnOnEquityTTM', None)
-					secData['revenue_ttm'] = getJsonPathData(data, '$.Highlights.RevenueTTM', None)
-					secData['revenue_per_share_ttm'] = getJsonPathData(data, '$.Highlights.RevenuePerShareTTM', None)
-					secData['quarterly_revenue_growth_yoy'] = getJsonPathData(data, '$.Highlights.QuarterlyRevenueGrowthYOY', None)
-					secData['gross_profit_ttm'] = getJsonPathData(data, '$.Highlights.GrossProfitTTM', None)
-					secData['diluted_eps_ttm'] = getJsonPathData(data, '$.Highlights.DilutedEpsTTM', None)
-					secData['quarterly_earnings_growth_yoy'] = getJsonPathData(data, '$.Highlights.QuarterlyEarningsGrowthYOY', None)
-					secData['forward_pe'] = getJsonPathData(data, '$.Valuation.ForwardPE', None)
-					secData['price_sales_ttm'] = getJsonPathData(data, '$.Valuation.PriceSalesTTM', None)
-					secData['price_book_mrq'] = getJsonPathData(data, '$.Valuation.PriceBookMRQ', None)
-					secData['enterprise_value'] = getJsonPathData(data, '$.Valuation.EnterpriseValue', None)
-					secData['enterprise_value_revenue'] = getJsonPathData(data, '$.Valuation.EnterpriseValueRevenue', None)
-					secData['enterprise_value_ebitda'] = getJsonPathData(data, '$.Valuation.EnterpriseValueEbitda', None)
+					for field, path, default in FUNDAMENTAL_FIELDS:
+						secData[field] = dpath(data, *path, default=default)
+					secData['most_recent_quarter'] = checkDateString(secData['most_recent_quarter'])
 
 					result = await self.client.update_security(secData)
 					if result.update_security.success != True:
 						self.logger.warning(f'Ticker update not successful for {secData["code"]}.{secData["exchange_code"]}')
 						self.logger.warning(result.update_security.error)
+					else:
+						self.addKnownTicker(secData['code'], secData['exchange_code'], secData['is_delisted'])
 
 					# Outstanding shares
 					try:
-						annualShares = getJsonPathData(data, '$.outstandingShares.annual.*', [])
-						if isinstance(annualShares, dict):
-							annualShares = [annualShares]
-						quarterlyShares = getJsonPathData(data, '$.outstandingShares.quarterly.*', [])
-						if isinstance(quarterlyShares, dict):
-							quarterlyShares = [quarterlyShares]
-						outstandingShares = [ {'date':s['dateFormatted'], 'outstanding_shares':int(s['shares'])} for s in annualShares + quarterlyShares]
+						# {'annual': {'0': {'date': '2023', 'dateFormatted': '2023-12-31', 'shares': 15550061000}, ...}, 'quarterly': {...}}
+						outstandingShares = []
+						for period in ('annual', 'quarterly'):
+							records = dpath(data, 'outstandingShares', period)
+							if isinstance(records, dict):
+								records = records.values()
+							elif not isinstance(records, list):
+								continue
+							outstandingShares.extend({'date':s['dateFormatted'], 'outstanding_shares':int(s['shares'])} for s in records)
 						if len(outstandingShares) > 0:
 							result = await self.client.update_outstanding_shares({'code': secData['code'], 'exchange_code': secData['exchange_code'], 'outstanding_shares': outstandingShares})
 							if result.update_outstanding_shares.success != True:
@@ -751,23 +971,24 @@ class EODUpdater(UpdaterBase):
 		"""
 		self.logger.debug(f'run() started')
 
-		# Start both tasks for first run
+		# Start all tasks for first run
+		fileWriterTask = asyncio.create_task(self.fileWriter())
 		consumerTask = asyncio.create_task(self.apiWriter())
 		producerTask = asyncio.create_task(self.restGetter())
 
 		self.logger.debug(f'all tasks started')
 
-		# Wait for the initial run to finish
-		await producerTask
-
 		try:
+			# Wait for the initial run to finish
+			await producerTask
+
 			while not self.cancelled:
 				# Calculate day and time of next run and wait
 				tomorrow = datetime.now() + timedelta(days=1)
 				nextRun = datetime(tomorrow.year, tomorrow.month, tomorrow.day, hour=2)
 				self.logger.info(f'next run at {nextRun.isoformat()}')
-				if not await pause.pauseUntil(nextRun):
-					# Exit if sleep was cancelled
+				if not await pauseUntil(nextRun):
+					# Exit if the next run time is invalid
 					break
 
 				# Pause finished, start EOD REST producer task again
@@ -776,8 +997,14 @@ class EODUpdater(UpdaterBase):
 
 		except Exception as e:
 			self.logger.error(e)
-
-		producerTask.cancel()
-		consumerTask.cancel()
-
-		self.logger.debug(f'all tasks stopped!')
\ No newline at end of file
+		finally:
+			# Also stop the tasks if run() itself gets cancelled
+			producerTask.cancel()
+			consumerTask.cancel()
+			for task in list(self.historyTasks):
+				task.cancel()
+			fileWriterTask.cancel()
+			# Only closes a client of its own, the shared client is closed by main()
+			await self.eodAsyncClient.aclose()
+
+			self.logger.debug(f'all tasks stopped!')
\ No newline at end of file
@@ -19,8 +19,9 @@
  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import json
+import orjson
 import asyncio
+import logging
 import websockets
 from enum import Enum
 
@@ -48,20 +49,24 @@ class EodWebsocket():
 		self.type = type
 		self.tickers = tickers
 		self.logger = getNewLogger('EOD-WS')
+		# The subscribe message is the same for every (re)connect, encode it once
+		self.subscribeMessage = orjson.dumps({'action': 'subscribe', 'symbols': ','.join(tickers)}).decode() if tickers else None
 
 	async def websocket_handler(self):
-		async for websocket in websockets.connect(EodWebsocket.WS_URL[self.type]+'?api_token='+self.apiToken, open_timeout=30):
+		async for websocket in websockets.connect(EodWebsocket.WS_URL[self.type.value]+'?api_token='+self.apiToken, open_timeout=30):
+			# Skip the debug logging of every message if it would be discarded anyway
+			debug = self.logger.isEnabledFor(logging.DEBUG)
 			try:
 				async for message in websocket:
-					self.logger.debug('RAW: ', message)
-					data = json.loads(message)
-					self.logger.debug('IN: ', data)
-					if 'status_code' in data.keys() and data['status_code'] == 200:
-						if self.tickers != None and len(self.tickers) > 0:
-							subMsg = {'action': 'subscribe', 'symbols': ','.join(self.tickers)}
-							outStr = json.dumps(subMsg)
-							self.logger.info('OUT: ', outStr)
-							await websocket.send(outStr)
+					if debug:
+						self.logger.debug('RAW: %s', message)
+					data = orjson.loads(message)
+					if debug:
+						self.logger.debug('IN: %s', data)
+					if 'status_code' in data and data['status_code'] == 200:
+						if self.subscribeMessage != None:
+							self.logger.info('OUT: %s', self.subscribeMessage)
+							await websocket.send(self.subscribeMessage)
 					else:
 						# TODO: Do something with the data
 						pass
@@ -21,7 +21,7 @@
 
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class EODUserData:
 	"""Dataclass object to handle user data like API limits
 	
@@ -21,6 +21,7 @@
 
 import json
 import httpx
+import orjson
 from datetime import date
 from decimal import Decimal
 from urllib.parse import urljoin
@@ -32,18 +33,53 @@ EODHD_IMG_URL = 'https://eodhd.com/img/'
 
 
 class EODHDAsyncClient():
-	def __init__(self, apiKey:str):
+	def __init__(self, apiKey:str, httpClient:httpx.AsyncClient=None):
 		self._apiKey = apiKey
-		self._httpClient = httpx.AsyncClient(timeout=60)
+		# The API key is sent as query parameter, so a shared client without auth headers can be used
+		self._ownsClient = httpClient == None
+		# HTTP/2 multiplexes the parallel requests of the updater over a few kept alive connections
+		self._httpClient = httpClient if httpClient != None else httpx.AsyncClient(
+			http2=True,
+			timeout=60,
+			limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30)
+		)
 		self.userData = EODUserData()
 
 
-	async def _restGet(self, path:str, params:dict={}) -> json:
+	async def aclose(self):
+		"""Close the HTTP client, a shared client is left open for its owner"""
+		if self._ownsClient:
+			await self._httpClient.aclose()
+
+
+	@staticmethod
+	def parseJson(content:bytes, parseFloat:bool=True) -> json:
+		"""Parse a JSON response
+
+		Args:
+			content (bytes): Raw JSON response
+			parseFloat (bool, optional): Parse floats as Decimal to keep prices exact. Defaults to True.
+
+		Returns:
+			json: Parsed JSON data or None
+		"""
+		if content == None:
+			return None
+		if parseFloat:
+			# orjson has no Decimal parsing, a float round trip could change the digits of prices
+			return json.loads(content, parse_float=Decimal)
+		return orjson.loads(content)
+
+
+	async def _restGet(self, path:str, params:dict=None, raw:bool=False, parseFloat:bool=True) -> json:
+		# Copy the parameters, never change the caller's dict
+		params = {**params} if params != None else {}
 		params['api_token'] = self._apiKey
 		params['fmt'] = 'json'
 		response = await self._httpClient.get(url=EODHD_API_URL+path, params=params)
 		if response.status_code == 200:
-			return json.loads(response.content, parse_float=Decimal)
+			# raw: return the unparsed response, e.g. to write it to a file
+			return response.content if raw else self.parseJson(response.content, parseFloat)
 		return None
 
 
@@ -57,13 +93,13 @@ class EODHDAsyncClient():
 
 
 	async def getUserData(self) -> EODUserData:
-		result = await self._restGet('user')
+		result = await self._restGet('user', parseFloat=False)
 		self.userData = EODUserData(**result)
 		return self.userData
 
 
 	async def getExchangesList(self) -> json:
-		return await self._restGet('exchanges-list')
+		return await self._restGet('exchanges-list', parseFloat=False)
 
 
 	async def getExchangeDetails(self, exchange:str='US') -> json:
@@ -72,18 +108,19 @@ class EODHDAsyncClient():
 
 	async def getExchangeSymbolList(self, exchange:str='US', delisted:bool=False) -> json:
 		params = {'delisted':'1'} if delisted else {}
-		return await self._restGet(f'exchange-symbol-list/{exchange.upper()}', params)
+		return await self._restGet(f'exchange-symbol-list/{exchange.upper()}', params, parseFloat=False)
 
 
 	async def getOptions(self, ticker:str) -> json:
 		return await self._restGet(f'options/{ticker.upper()}')
 
 
-	async def getFundamentals(self, ticker:str) -> json:
-		return await self._restGet(f'fundamentals/{ticker.upper()}')
+	async def getFundamentals(self, ticker:str, raw:bool=False) -> json:
+		return await self._restGet(f'fundamentals/{ticker.upper()}', raw=raw)
 
 
 	async def _getBulk(self, exchange:str, params:dict, date:date=None) -> json:
+		params = {**params}
 		if date != None:
 			params['date'] = date.isoformat()
 		return await self._restGet(f'eod-bulk-last-day/{exchange.upper()}', params=params)
@@ -101,22 +138,23 @@ class EODHDAsyncClient():
 		return await self._getBulk(exchange=exchange, params={'type':'dividends'}, date=date)
 	
 
-	async def _getWithDateRange(self, path:str, fromDate:date=None, toDate:date=None, params:dict={}) -> json:
+	async def _getWithDateRange(self, path:str, fromDate:date=None, toDate:date=None, params:dict=None, raw:bool=False) -> json:
+		params = {**params} if params != None else {}
 		if fromDate != None:
 			params['from'] = fromDate.isoformat()
 		if toDate != None:
 			params['to'] = toDate.isoformat()
-		return await self._restGet(path, params=params)
+		return await self._restGet(path, params=params, raw=raw)
 
 
-	async def getSplitAdjustedQuotes(self, ticker:str, fromDate:date=None, toDate:date=None) -> json:
+	async def getSplitAdjustedQuotes(self, ticker:str, fromDate:date=None, toDate:date=None, raw:bool=False) -> json:
 		# Use technical API endpoint to receive split adjusted candles
 		params = {'function':'splitadjusted'}
-		return await self._getWithDateRange(f'technical/{ticker.upper()}', fromDate, toDate, params)
+		return await self._getWithDateRange(f'technical/{ticker.upper()}', fromDate, toDate, params, raw)
 
 
-	async def getHistoricalQuotes(self, ticker:str, fromDate:date=None, toDate:date=None) -> json:
-		return await self._getWithDateRange(f'eod/{ticker.upper()}', fromDate, toDate)
+	async def getHistoricalQuotes(self, ticker:str, fromDate:date=None, toDate:date=None, raw:bool=False) -> json:
+		return await self._getWithDateRange(f'eod/{ticker.upper()}', fromDate, toDate, raw=raw)
 	
 
 	async def getHistoricalDividends(self, ticker:str, fromDate:date=None, toDate:date=None) -> json:
@@ -22,7 +22,7 @@
 import json
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class QueueObject:
     type: str
     data: json
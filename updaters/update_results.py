@@ -19,15 +19,27 @@
  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+from typing import NamedTuple
+
 from log_config import getNewLogger
 
+
+class UpdateResult(NamedTuple):
+	"""Result of a single update operation"""
+	ticker:str
+	id:int
+	success:bool
+
+
 class UpdateResults:
 	"""UpdateResults collects all performed updates from an Updater class.
 	"""
 
+	__slots__ = ('name', 'results', 'logger')
+
 	def __init__(self, name:str):
 		self.name = name
-		self.results = {}
+		self.results:dict[str, list[UpdateResult]] = {}
 		self.logger = getNewLogger(f'{name}-results')
 
 
@@ -41,13 +53,6 @@ class UpdateResults:
 			id (int, optional): ID of the security if available.
 		"""
 		if method != None and len(method) > 0:
-			if method not in self.results.keys():
-				self.results[method] = []
-
-			self.results[method].append({
-				'ticker': ticker,
-				'id': id,
-				'success': success
-			})
+			self.results.setdefault(method, []).append(UpdateResult(ticker, id, success))
 		else:
 			self.logger.warning(f'Invalid method name for UpdateResults')
\ No newline at end of file
@@ -19,37 +19,61 @@
  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import os
 import json
 import httpx
 import asyncio
 import pandas as pd
+from functools import lru_cache
 
+from config import CONFIG
 from log_config import getNewLogger
-
-from threading import Lock
+from utils import getHttpClient
 
 from .queue_object import QueueObject
 from .update_results import UpdateResults
 
 from ascentrade_client import AscentradeClient
 
+# Maximum number of files written in one worker thread call
+FILE_WRITE_BATCH_SIZE = 32
+# Maximum number of securities updated with one GraphQL request
+SECURITY_BATCH_SIZE = 32
+
+
+@lru_cache(maxsize=8)
+def updateSecuritiesQuery(count:int) -> str:
+	"""Build a GraphQL document with one aliased updateSecurity mutation per security
+
+	Args:
+		count (int): Number of securities
+
+	Returns:
+		str: GraphQL document with the variables $data0 .. $data{count-1} and the results s0 .. s{count-1}
+	"""
+	variables = ', '.join(f'$data{i}: SecurityInput!' for i in range(count))
+	mutations = '\n'.join(f'  s{i}: updateSecurity(data: $data{i}) {{ success error }}' for i in range(count))
+	return f'mutation UpdateSecurities({variables}) {{\n{mutations}\n}}'
+
 
 class UpdaterBase():
-	def __init__(self, name:str, authToken:str):
+	def __init__(self, name:str, authToken:str, transport:httpx.AsyncBaseTransport=None):
 		self.name = name
 		self.authToken = authToken
+		# Without a given transport all updaters share the process wide connection pool
+		# Client for data providers, without default headers
+		self.httpClient = getHttpClient(transport=transport)
+		# The headers argument of AscentradeClient is ignored for a given http_client, the auth token is set on the client itself
 		self.client = AscentradeClient(
-			os.environ.get('graphql_host'),
-			http_client=httpx.AsyncClient(timeout=60.0),
-			headers={'x-auth-token':authToken}
+			CONFIG.graphql_host,
+			http_client=getHttpClient({'x-auth-token':authToken}, transport)
 		)
 		self.logger = getNewLogger(name)
 		self.results = UpdateResults(name)
 		self.queue = asyncio.Queue()
-		self.lock = Lock()
+		self.fileQueue = asyncio.Queue()
 		self.cancelled = False
 		self.allTickers:pd.DataFrame
+		self.knownTickers:set[tuple] = set()
 	
 
 	async def updateTickers(self):
@@ -59,17 +83,29 @@ class UpdaterBase():
 			# Get all tickers
 			self.logger.info(f'Get all available tickers...')
 			data = await self.client.all_security_tickers()
-			tickers = []
+			# Collect the columns directly, faster than building a DataFrame from a list of dicts
+			ids, codes, lastUpdates, delisted, exchangeCodes, virtualExchanges = [], [], [], [], [], []
+			knownTickers = set()
 			for t in data.securities:
-				tickers.append({
-					'id': t.id,
-					'code': t.code,
-					'last_update': t.last_update,
-					'is_delisted': t.is_delisted,
-					'exchange_code': t.exchange.code,
-					'virtual_exchange': t.exchange.virtual_exchange
-				})
-			self.allTickers = pd.DataFrame(tickers)
+				ids.append(t.id)
+				codes.append(t.code)
+				lastUpdates.append(t.last_update)
+				delisted.append(t.is_delisted)
+				exchangeCodes.append(t.exchange.code)
+				virtualExchanges.append(t.exchange.virtual_exchange)
+				# Upper case lookup set for checkKnownTicker, a ticker is known by its exchange and virtual exchange
+				for exchangeCode in (t.exchange.code, t.exchange.virtual_exchange):
+					if t.code != None and exchangeCode != None:
+						knownTickers.add((t.code.upper(), exchangeCode.upper(), t.is_delisted))
+			self.allTickers = pd.DataFrame({
+				'id': ids,
+				'code': codes,
+				'last_update': lastUpdates,
+				'is_delisted': delisted,
+				'exchange_code': exchangeCodes,
+				'virtual_exchange': virtualExchanges
+			})
+			self.knownTickers = knownTickers
 			self.logger.info(f'Got {len(self.allTickers)} tickers')
 		except Exception as e:
 			self.logger.error(f'updateTickers() failed!')
@@ -90,12 +126,53 @@ class UpdaterBase():
 		if symbol == None or exchangeCode == None:
 			raise Exception(f'invalid input parameters for checkKnownTicker({symbol}, {exchangeCode})')
 
-		symbol = symbol.upper()
-		exchangeCode = exchangeCode.upper()
-		filtered = self.allTickers.query('code == @symbol and (exchange_code == @exchangeCode or virtual_exchange == @exchangeCode) and is_delisted == @delisted')
-		if len(filtered) > 0:
-			return True
-		return False
+		# Normalize the key once, a single set lookup for hits and misses
+		return (symbol.upper(), exchangeCode.upper(), delisted) in self.knownTickers
+
+
+	async def updateSecurities(self, securities:list[dict]) -> list[dict]:
+		"""Create or update several securities with one GraphQL request, falls back to single requests if the batch fails
+
+		Args:
+			securities (list[dict]): SecurityInput data for each security
+
+		Returns:
+			list[dict]: Result {'success': bool, 'error': str} for each security
+		"""
+		if len(securities) == 0:
+			return []
+		try:
+			response = await self.client.execute(
+				query=updateSecuritiesQuery(len(securities)),
+				operation_name='UpdateSecurities',
+				variables={f'data{i}': sec for i, sec in enumerate(securities)}
+			)
+			data = self.client.get_data(response)
+			return [data[f's{i}'] for i in range(len(securities))]
+		except Exception as e:
+			self.logger.warning(f'Batch update of {len(securities)} securities failed, update them one by one')
+			self.logger.warning(e)
+
+		results = []
+		for sec in securities:
+			try:
+				result = await self.client.update_security(sec)
+				results.append({'success': result.update_security.success, 'error': result.update_security.error})
+			except Exception as e:
+				results.append({'success': False, 'error': str(e)})
+		return results
+
+
+	def addKnownTicker(self, symbol:str, exchangeCode:str, delisted:bool=False):
+		"""Add a ticker to the known tickers, e.g. after it was added to the database
+
+		Args:
+			symbol (str): Stock symbol
+			exchangeCode (str): Exchange code
+			delisted (bool): listing state of the stock
+		"""
+		if symbol != None and exchangeCode != None:
+			self.knownTickers.add((symbol.upper(), exchangeCode.upper(), delisted))
 
 
 	async def queueObject(self, type:str, object:json, context:dict={}):
@@ -115,4 +192,47 @@ class UpdaterBase():
 		Returns:
 			QueueObject: Dataclass object from queue
 		"""
-		return await self.queue.get()
\ No newline at end of file
+		return await self.queue.get()
+
+
+	async def queueFile(self, path:str, data:bytes):
+		"""Helper function to add a file to the internal file queue, the file is written by the **fileWriter** task
+
+		Args:
+			path (str): Path of the file to write
+			data (bytes): File content
+		"""
+		await self.fileQueue.put((path, data))
+
+
+	def writeFiles(self, files:list):
+		"""Write a batch of files, called from a worker thread
+
+		Args:
+			files (list): List of (path, data) tuples
+		"""
+		for path, data in files:
+			try:
+				with open(path, 'wb') as f:
+					f.write(data)
+			except Exception as e:
+				self.logger.error(f'Error while writing to file {path}')
+				self.logger.error(e)
+
+
+	async def fileWriter(self):
+		"""Always running task which writes all queued files in batches from a worker thread
+		"""
+		try:
+			while True:
+				# Wait for the next file and take everything else already queued
+				files = [await self.fileQueue.get()]
+				while len(files) < FILE_WRITE_BATCH_SIZE and not self.fileQueue.empty():
+					files.append(self.fileQueue.get_nowait())
+				await asyncio.to_thread(self.writeFiles, files)
+		finally:
+			# Write remaining files on shutdown
+			files = []
+			while not self.fileQueue.empty():
+				files.append(self.fileQueue.get_nowait())
+			self.writeFiles(files)
@@ -20,13 +20,17 @@
 """
 
 import json
+import httpx
 from typing import Any
+from functools import lru_cache
+from jsonpath_ng import JSONPath
 from jsonpath_ng.ext import parse
 from datetime import date
 from decimal import Decimal, InvalidOperation
 
+@lru_cache(maxsize=1024)
 def parseSplit(splitStr:str) -> tuple[Decimal, Decimal]:
-	"""Parses Decimal numbers from a string which represents a stock split like '10.0/1.0'
+	"""Parses Decimal numbers from a string which represents a stock split like '10.0/1.0'. Split ratios repeat a lot, the results are cached.
 
 	Args:
 		splitStr (str): String to parse
@@ -46,22 +50,6 @@ def parseSplit(splitStr:str) -> tuple[Decimal, Decimal]:
 		raise Exception(f'Unable to parse split {splitStr}')
 
 
-def getObject(dictIn:dict, key:str, default=None):
-	"""Save getting of dict values
-
-	Args:
-		dictIn (dict): Dictionary in
-		key (str): Key to get from the dict
-
-	Returns:
-		_type_: Value from dict or default value
-	"""
-	try:
-		return dictIn[key] if key in dictIn else default
-	except:
-		return default
-
-
 def renameListDictKeys(listIn: list, names: dict) -> list:
 	"""Rename all keys from a list of dicts.
 
@@ -70,14 +58,17 @@ def renameListDictKeys(listIn: list, names: dict) -> list:
 		names (dict): Mapping dict {'oldName':'newName'}
 
 	Returns:
-		list: List with renamed dict keys
+		list: New list with new dicts with renamed keys, the key order is kept
 	"""
-	for o in listIn:
-		for k in names.keys():
-			if k in o.keys():
-				o[names[k]] = o[k]
-				del o[k]
-	return listIn
+	# One pass per dict instead of a lookup and delete for every name
+	return [{names.get(k, k): v for k, v in o.items()} for o in listIn]
+
+
+# Strings which are parsed as True by parseBoolean
+TRUE_STRINGS = frozenset(('1', 'true', 't', 'yes', 'y'))
+
+# Lower case lookup for parseDividendPeriod
+DIVIDEND_PERIODS = {p.lower(): p for p in ('Weekly', 'Monthly', 'Quarterly', 'SemiAnnual', 'Annual', 'Other')}
 
 
 def parseBoolean(value) -> bool:
@@ -92,8 +83,7 @@ def parseBoolean(value) -> bool:
 	if isinstance(value, bool):
 		return value
 	elif isinstance(value, str):
-		if len(value) > 0 and value.lower() in ['1', 'true', 't', 'yes', 'y']:
-			return True
+		return value.lower() in TRUE_STRINGS
 	return False
 
 
@@ -119,19 +109,52 @@ def parseInt(value:Any, default:int) -> int:
 	return default
 
 
-def getJsonPathData(obj:dict, jsonPath:str, default:Any=None) -> Any:
+def dpath(obj:dict, *keys, default:Any=None) -> Any:
+	"""Get a nested value from a dict by a fixed key path, faster than JSONPath for paths without wildcards
+
+	Args:
+		obj (dict): JSON/Dict input data
+		*keys: Keys to follow like 'General', 'Code'
+		default (Any, optional): Default value if a key is missing. Defaults to None.
+
+	Returns:
+		Any: Return data or default value
+	"""
+	for key in keys:
+		if not isinstance(obj, dict) or key not in obj:
+			return default
+		obj = obj[key]
+	return obj
+
+
+@lru_cache(maxsize=512)
+def compileJsonPath(jsonPath:str) -> JSONPath:
+	"""Parse a JSONPath expression once, the parsed expression is cached for each path
+
+	Args:
+		jsonPath (str): JSONPath expression
+
+	Returns:
+		JSONPath: Parsed expression
+	"""
+	return parse(jsonPath)
+
+
+def getJsonPathData(obj:dict, jsonPath:str|JSONPath, default:Any=None) -> Any:
 	"""Extract data from JSON/Dict using JSONPath
 
 	Args:
 		obj (dict): JSON/Dict input data
-		jsonPath (str): JSONPath to the data
+		jsonPath (str | JSONPath): JSONPath to the data, either as string or already parsed by **compileJsonPath** (e.g. as module constant)
 		default (Any, optional): Default value if invalid/error. Defaults to None.
 
 	Returns:
 		Any: Return data or default value
 	"""
 	try:
-		matches = parse(jsonPath).find(obj)
+		if isinstance(jsonPath, str):
+			jsonPath = compileJsonPath(jsonPath)
+		matches = jsonPath.find(obj)
 		if len(matches) == 1:
 			return matches[0].value
 		if len(matches) > 1:
@@ -150,25 +173,79 @@ def parseDividendPeriod(input:str) -> str:
 	Returns:
 		str: Correct type or 'Other'
 	"""
-	try:
-		PERIODS = ['Weekly', 'Monthly', 'Quarterly', 'SemiAnnual', 'Annual', 'Other']
-		if input == None or type(input) != str or len(input) == 0:
-			return 'Other'
-
-		# Lower case comparison
-		input = input.lower()
-		for idx, p in enumerate(PERIODS):
-			if input == p.lower():
-				return PERIODS[idx]
-	except:
-		pass
-	return 'Other'
+	if not isinstance(input, str):
+		return 'Other'
+	# Lower case comparison
+	return DIVIDEND_PERIODS.get(input.lower(), 'Other')
+
+
+@lru_cache(maxsize=4096)
+def _isoDate(dateStr:str) -> str:
+	return date.fromisoformat(dateStr).isoformat()
 
 
 def checkDateString(dateStr:str) -> str:
+	"""Validate an ISO date string, the same dates repeat across tickers and are served from a cache
+
+	Args:
+		dateStr (str): Date string like '2024-03-31'
+
+	Returns:
+		str: Normalized ISO date or None if invalid
+	"""
 	try:
-		dt = date.fromisoformat(dateStr)
-		return dt.isoformat()
+		return _isoDate(dateStr)
 	except:
 		pass
-	return None
\ No newline at end of file
+	return None
+
+
+# Process wide connection pool and HTTP client, created on first use
+_HTTP_TRANSPORT:httpx.AsyncHTTPTransport = None
+_HTTP_CLIENT:httpx.AsyncClient = None
+
+
+def getHttpTransport() -> httpx.AsyncHTTPTransport:
+	"""Get the transport with the connection pool shared by all HTTP clients
+
+	Returns:
+		httpx.AsyncHTTPTransport: Shared HTTP/2 transport
+	"""
+	global _HTTP_TRANSPORT
+	if _HTTP_TRANSPORT == None:
+		# HTTP/2 and pool limits are set on the transport, the client ignores them if a transport is given
+		_HTTP_TRANSPORT = httpx.AsyncHTTPTransport(
+			http2=True,
+			limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=300),
+			retries=2
+		)
+	return _HTTP_TRANSPORT
+
+
+def getHttpClient(headers:dict=None, transport:httpx.AsyncBaseTransport=None) -> httpx.AsyncClient:
+	"""Get an HTTP client on the shared connection pool. Without headers and transport the process wide client without any default headers is returned.
+
+	With headers a new client is created on the same transport, e.g. for the backend auth token. The headers are only sent by that client and never reach other hosts.
+
+	Args:
+		headers (dict, optional): Default headers of the new client. Defaults to None.
+		transport (httpx.AsyncBaseTransport, optional): Transport to use instead of the shared one. Defaults to None.
+
+	Returns:
+		httpx.AsyncClient: HTTP client using the shared HTTP/2 connection pool
+	"""
+	global _HTTP_CLIENT
+	if headers != None or transport != None:
+		return httpx.AsyncClient(timeout=60.0, transport=transport if transport != None else getHttpTransport(), headers=headers)
+	if _HTTP_CLIENT == None or _HTTP_CLIENT.is_closed:
+		_HTTP_CLIENT = httpx.AsyncClient(timeout=60.0, transport=getHttpTransport())
+	return _HTTP_CLIENT
+
+
+async def closeHttpClient():
+	"""Close the shared connection pool, this ends all clients created by getHttpClient"""
+	global _HTTP_TRANSPORT, _HTTP_CLIENT
+	if _HTTP_TRANSPORT != None:
+		await _HTTP_TRANSPORT.aclose()
+	_HTTP_TRANSPORT = None
+	_HTTP_CLIENT = None